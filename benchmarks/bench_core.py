@@ -0,0 +1,347 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks for the hot paths of ``tspreproc.core``.
+
+Runs offline on synthetic data and reports throughput (items per second) and
+peak memory for each case. Results can be stored as a baseline and later runs
+compared against it; a case whose throughput drops below the baseline by more
+than ``--tolerance`` makes the script exit with a non-zero status.
+
+Examples
+--------
+::
+
+    python benchmarks/bench_core.py --size 1000 --size 100000 --save-baseline
+    python benchmarks/bench_core.py --size 1000 --size 100000
+"""
+
+from __future__ import print_function
+
+import argparse
+from datetime import datetime
+import gc
+import json
+import os
+import random
+import sys
+import time
+from timeit import default_timer
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+# CPU time is not inflated when the benchmark process is preempted.
+clock = getattr(time, 'process_time', default_timer)
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from tspreproc import core  # noqa: E402
+
+
+START = time.mktime(datetime(2018, 12, 31).timetuple())
+STEP = 60.0
+STRPTIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+KINDS = ('linear', 'nearest', 'zero', 'slinear', 'quadratic', 'cubic')
+RATIOS = (1, 4, 16)
+MIN_TIME = 0.2
+MEMORY_FLOOR = 64 * 1024
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def timestamps(size, irregular=False, seed=0):
+    """returns a generator of ``size`` increasing UNIX timestamps spaced by
+    ``STEP`` on average.
+    """
+    rnd = random.Random(seed)
+    ts = START
+    for _ in range(size):
+        yield ts
+        ts += rnd.expovariate(1.0 / STEP) if irregular else STEP
+
+
+def records(size, style, irregular=False):
+    """returns a generator of records whose timestamp is encoded according to
+    ``style`` along with the matching ``ts_format``.
+    """
+    if style == 'dateutil':
+        def fmt(ts):
+            return datetime.fromtimestamp(ts).isoformat(' ')
+        ts_format = None
+    elif style == 'strptime':
+        def fmt(ts):
+            return datetime.fromtimestamp(ts).strftime(STRPTIME_FORMAT)
+        ts_format = STRPTIME_FORMAT
+    elif style == 'callable':
+        fmt = repr
+        ts_format = float
+    else:
+        raise ValueError(style)
+    seq = (
+        {'timestamp': fmt(ts), 'value': i % 100}
+        for i, ts in enumerate(timestamps(size, irregular))
+    )
+    return seq, ts_format
+
+
+def series(cls, size, irregular=False, **kwargs):
+    seq, ts_format = records(size, 'callable', irregular)
+    return cls(seq, ts_format=ts_format, **kwargs)
+
+
+def _span(size):
+    return START, START + size * STEP
+
+
+def case_construct(style):
+    def setup(size, irregular):
+        seq, ts_format = records(size, style, irregular)
+        seq = list(seq)
+
+        def run():
+            core.Interpolator(seq, ts_format=ts_format)
+            return size
+        return run
+    return setup
+
+
+def case_interpolator_call(size, irregular):
+    t = series(core.Interpolator, size, irregular)
+    points = list(timestamps(size, True, seed=1))
+
+    def run():
+        for p in points:
+            t(p)
+        return size
+    return run
+
+
+def case_interpolator_generate(kind):
+    def setup(size, irregular):
+        t = series(core.Interpolator, size, irregular, kind=kind)
+        s, e = _span(size)
+
+        def run():
+            return sum(1 for _ in t.generate(s, e, STEP, value_only=True))
+        return run
+    return setup
+
+
+def case_interpolator_generate_out(size, irregular):
+    t = series(core.Interpolator, size, irregular)
+    s, e = _span(size)
+    out = bytearray(8 * size)
+
+    def run():
+        return t.generate(s, e, STEP, out=out)
+    return run
+
+
+def case_aggregator_call(size, irregular):
+    t = series(
+        core.Aggregator, size, irregular,
+        aggregation_func=lambda it: sum(d[1] for d in it)
+    )
+    points = list(timestamps(size, True, seed=1))
+
+    def run():
+        for p in points:
+            t(p, p + STEP)
+        return size
+    return run
+
+
+def case_aggregator_generate(ratio):
+    def setup(size, irregular):
+        t = series(
+            core.Aggregator, size, irregular,
+            aggregation_func=lambda it: sum(d[1] for d in it)
+        )
+        s, e = _span(size)
+
+        def run():
+            return sum(1 for _ in t.generate(
+                s, e, STEP * ratio, STEP, value_only=True
+            ))
+        return run
+    return setup
+
+
+CASES = [
+    ('construct[%s]' % style, case_construct(style))
+    for style in ('dateutil', 'strptime', 'callable')
+] + [
+    ('Interpolator.__call__', case_interpolator_call),
+] + [
+    ('Interpolator.generate[%s]' % kind, case_interpolator_generate(kind))
+    for kind in KINDS
+] + [
+    ('Interpolator.generate[out]', case_interpolator_generate_out),
+] + [
+    ('Aggregator.__call__', case_aggregator_call),
+] + [
+    ('Aggregator.generate[duration/step=%d]' % ratio,
+     case_aggregator_generate(ratio))
+    for ratio in RATIOS
+]
+
+
+def measure(run, repeat, min_time=MIN_TIME):
+    """returns the best throughput over ``repeat`` rounds and the peak memory
+    in bytes (``None`` if ``tracemalloc`` is unavailable). Like
+    ``timeit.Timer.autorange``, each round calls ``run`` until at least
+    ``min_time`` seconds of CPU time have elapsed, after one untimed warm-up
+    call. Memory is traced in a separate run so that it does not skew the
+    timings.
+    """
+    run()
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        n = 0
+        elapsed = 0.0
+        begin = clock()
+        while elapsed < min_time:
+            n += run()
+            elapsed = clock() - begin
+        throughput = n / elapsed
+        best = throughput if best is None else max(best, throughput)
+    peak = None
+    if tracemalloc is not None:
+        gc.collect()
+        tracemalloc.start()
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return best, peak
+
+
+def _format_bytes(n):
+    if n is None:
+        return '-'
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if n < 1024.0:
+            return '%.1f%s' % (n, unit)
+        n /= 1024.0
+    return '%.1fTiB' % n
+
+
+def run_benchmarks(sizes, irregular=False, repeat=5, pattern=None,
+                   min_time=MIN_TIME):
+    results = {}
+    for size in sizes:
+        for name, setup in CASES:
+            if pattern is not None and pattern not in name:
+                continue
+            key = '%s@%d%s' % (name, size, '~' if irregular else '')
+            throughput, peak = measure(
+                setup(size, irregular), repeat, min_time
+            )
+            results[key] = {'throughput': throughput, 'peak_memory': peak}
+            print('%-50s %14.1f items/s %12s' % (
+                key, throughput, _format_bytes(peak)
+            ))
+    return results
+
+
+def compare(results, baseline, tolerance, memory_tolerance,
+            memory_floor=MEMORY_FLOOR):
+    """returns the list of keys whose throughput dropped by more than
+    ``tolerance`` or whose peak memory grew by more than ``memory_tolerance``
+    relative to ``baseline``. Memory growth below ``memory_floor`` bytes is
+    ignored.
+    """
+    regressions = []
+    for key, result in sorted(results.items()):
+        if key not in baseline:
+            continue
+        expected = baseline[key]['throughput']
+        if result['throughput'] < expected * (1.0 - tolerance):
+            regressions.append(key)
+            print('REGRESSION %s: %.1f items/s (baseline %.1f items/s)' % (
+                key, result['throughput'], expected
+            ), file=sys.stderr)
+        peak = result['peak_memory']
+        expected = baseline[key]['peak_memory']
+        if peak is not None and expected is not None and \
+                peak - expected > max(
+                    expected * memory_tolerance, memory_floor
+                ):
+            if key not in regressions:
+                regressions.append(key)
+            print('REGRESSION %s: peak memory %s (baseline %s)' % (
+                key, _format_bytes(peak), _format_bytes(expected)
+            ), file=sys.stderr)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument(
+        '--size', type=int, action='append',
+        help='number of points, may be repeated (default: 1000)'
+    )
+    parser.add_argument(
+        '--irregular', action='store_true',
+        help='use exponentially distributed spacing between points'
+    )
+    parser.add_argument(
+        '--repeat', type=int, default=5,
+        help='number of timed rounds, the best is kept (default: 5)'
+    )
+    parser.add_argument(
+        '--min-time', type=float, default=MIN_TIME,
+        help='minimum seconds per timed round (default: %s)' % MIN_TIME
+    )
+    parser.add_argument(
+        '-k', dest='pattern', help='only run cases whose name contains this'
+    )
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument(
+        '--save-baseline', action='store_true',
+        help='merge the results into the baseline instead of comparing'
+    )
+    parser.add_argument(
+        '--tolerance', type=float, default=0.2,
+        help='allowed relative throughput drop (default: 0.2)'
+    )
+    parser.add_argument(
+        '--memory-tolerance', type=float, default=0.2,
+        help='allowed relative peak memory growth (default: 0.2)'
+    )
+    parser.add_argument(
+        '--memory-floor', type=int, default=MEMORY_FLOOR,
+        help='ignore peak memory growth below this many bytes '
+             '(default: %d)' % MEMORY_FLOOR
+    )
+    parser.add_argument(
+        '--allow-missing-baseline', action='store_true',
+        help='exit with zero status when there is no baseline to compare'
+    )
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        args.size or [1000], irregular=args.irregular, repeat=args.repeat,
+        pattern=args.pattern, min_time=args.min_time
+    )
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    if args.save_baseline:
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        return 0
+    if not baseline:
+        print('no baseline found at %s' % args.baseline, file=sys.stderr)
+        return 0 if args.allow_missing_baseline else 1
+    regressions = compare(
+        results, baseline, args.tolerance, args.memory_tolerance,
+        args.memory_floor
+    )
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,10 +1,12 @@
 # -*- coding: utf-8 -*-
 
 import unittest
+import array
 from types import GeneratorType
 from datetime import datetime, timedelta
 import time
 
+import numpy as np
 from scipy.interpolate import interp1d
 
 from tspreproc import core
@@ -97,6 +99,26 @@ class InterpolatorTest(unittest.TestCase):
         with self.assertRaises(TypeError):
             t2 = core.Interpolator([], ts_format=123)
 
+    def test__init__parallel(self):
+        seq = [
+            {'timestamp': '2018-12-31 18:%02d:00' % ((i * 7) % 60), 'value': i}
+            for i in range(200)
+        ]
+        t = core.Interpolator(seq)
+        t2 = core.Interpolator(seq, processes=2)
+        self.assertEqual(list(t), list(t2))
+        t2 = core.Interpolator(iter(seq), processes=3, chunksize=7)
+        self.assertEqual(list(t), list(t2))
+        t2 = core.Interpolator([], processes=2)
+        self.assertEqual(len(t2), 0)
+        get_pool_context = core._get_pool_context
+        core._get_pool_context = lambda: None
+        try:
+            t2 = core.Interpolator(seq, processes=2)
+        finally:
+            core._get_pool_context = get_pool_context
+        self.assertEqual(list(t), list(t2))
+
     def test__call__(self):
         t = core.Interpolator([
             {'timestamp': '2018-12-31 18:30:00', 'value': 89},
@@ -108,6 +130,43 @@ class InterpolatorTest(unittest.TestCase):
         t = core.Interpolator([])
         self.assertEqual(t('2018-12-31 18:30:30'), 0.0)
 
+    def test_stats(self):
+        t = core.Interpolator([
+            {'timestamp': '2018-12-31 18:30:00', 'value': 89},
+            {'timestamp': '2018-12-31 18:31:00', 'value': 80},
+            {'timestamp': '2018-12-31 18:32:00', 'value': 85}
+        ])
+        self.assertIsNone(t.stats())
+        with self.assertRaises(ValueError):
+            t.add_hook(lambda event, values: None)
+        t = core.Interpolator([
+            {'timestamp': '2018-12-31 18:30:00', 'value': 89},
+            {'timestamp': '2018-12-31 18:31:00', 'value': 80},
+            {'timestamp': '2018-12-31 18:32:00', 'value': 85}
+        ], instrument=True)
+        events = []
+        t.add_hook(lambda event, values: events.append(event))
+        t('2018-12-31 18:30:30')
+        t.add((time.mktime(datetime(2018, 12, 31, 18, 33).timetuple()), 1.0))
+        t.kind = 'nearest'
+        stats = t.stats()
+        self.assertEqual(stats['records_parsed'], 3)
+        self.assertEqual(stats['queries'], 1)
+        self.assertEqual(stats['inserts'], 1)
+        self.assertGreater(stats['insert_time'], 0)
+        self.assertEqual(stats['rebuilds'], 2)
+        self.assertEqual(events, ['query', 'insert', 'rebuild'])
+        t.reset_stats()
+        self.assertEqual(t.stats()['queries'], 0)
+        seq = [
+            {'timestamp': '2018-12-31 18:%02d:00' % (i % 60), 'value': i}
+            for i in range(200)
+        ]
+        t = core.Interpolator(seq, processes=2, instrument=True)
+        stats = t.stats()
+        self.assertEqual(stats['records_parsed'], 200)
+        self.assertGreater(stats['parse_time'], 0)
+
     def test__tidy_ts_value(self):
         t = core.Interpolator([
             {'timestamp': '2018-12-31 18:30:00', 'value': 89},
@@ -166,6 +225,52 @@ class InterpolatorTest(unittest.TestCase):
         expects = [ip(i) for i in range(120)]
         self.assertEquals(res, expects)
 
+    def test_generate_out(self):
+        t = core.Interpolator([
+            {'timestamp': '2018-12-31 18:30:00', 'value': 89},
+            {'timestamp': '2018-12-31 18:31:00', 'value': 80},
+            {'timestamp': '2018-12-31 18:32:00', 'value': 85}
+        ])
+        expects = list(t.generate(
+            '2018-12-31 18:30:00', '2018-12-31 18:32:00', 0.7,
+            value_only=True
+        ))
+        out = np.zeros(200)
+        n = t.generate(
+            '2018-12-31 18:30:00', '2018-12-31 18:32:00', 0.7, out=out
+        )
+        self.assertEqual(n, len(expects))
+        self.assertEqual(list(out[:n]), expects)
+        self.assertTrue(np.all(out[n:] == 0.0))
+        buf = bytearray(8 * 10)
+        n = t.generate(
+            '2018-12-31 18:30:00', '2018-12-31 18:32:00', 0.7, out=buf
+        )
+        self.assertEqual(n, 10)
+        self.assertEqual(
+            list(np.frombuffer(buf, dtype=np.float64)), expects[:10]
+        )
+        with self.assertRaises(ValueError):
+            t.generate(0, 1, 0.2, out=bytes(8))
+        with self.assertRaises(ValueError):
+            t.generate(0, 1, 0.2, out=np.zeros(5, dtype=np.int32))
+        with self.assertRaises(ValueError):
+            t.generate(0, 1, 0.2, out=np.zeros(5, dtype=np.float32))
+        with self.assertRaises(ValueError):
+            t.generate(0, 1, 0.2, out=np.zeros((5, 2)))
+        with self.assertRaises(ValueError):
+            t.generate(0, 1, 0.2, out=array.array('i', [0] * 8))
+        with self.assertRaises(ValueError):
+            t.generate(0, 1, 0.2, out=memoryview(np.zeros(8, np.int32)))
+        with self.assertRaises(ValueError):
+            t.generate(0, 1, 0.2, out=memoryview(np.zeros((2, 3))))
+        out = array.array('d', [0.0] * 10)
+        n = t.generate(
+            '2018-12-31 18:30:00', '2018-12-31 18:32:00', 0.7, out=out
+        )
+        self.assertEqual(n, 10)
+        self.assertEqual(list(out), expects[:10])
+
 
 class GeneratorTest(unittest.TestCase):
     def setUp(self):
@@ -204,3 +309,44 @@ class GeneratorTest(unittest.TestCase):
                        '30 seconds')
         res = list(g)
         self.assertEquals(res, expects2)
+
+    def test_stats(self):
+        t = core.Aggregator([
+            {'timestamp': '2018-12-31 18:30:00', 'value': 89},
+            {'timestamp': '2018-12-31 18:30:30', 'value': 82},
+            {'timestamp': '2018-12-31 18:31:00', 'value': 80},
+            {'timestamp': '2018-12-31 18:31:30', 'value': 82},
+        ], aggregation_func=lambda it: sum(d[1] for d in it), instrument=True)
+        samples = []
+        t.add_hook(lambda event, values: samples.append(values['samples']))
+        res = list(t.generate('2018-12-31 18:30:00', '2018-12-31 18:32:00',
+                              '1 min', '30 seconds', value_only=True))
+        self.assertEqual(res, [89.0 + 82.0, 82.0 + 80.0, 80.0 + 82.0, 82.0])
+        stats = t.stats()
+        self.assertEqual(stats['windows'], 4)
+        self.assertEqual(stats['samples_scanned'], 7)
+        self.assertEqual(stats['max_samples_per_window'], 2)
+        self.assertEqual(samples, [2, 2, 2, 1])
+
+    def test_generate_out(self):
+        t = core.Aggregator([
+            {'timestamp': '2018-12-31 18:30:00', 'value': 89},
+            {'timestamp': '2018-12-31 18:30:30', 'value': 82},
+            {'timestamp': '2018-12-31 18:31:00', 'value': 80},
+            {'timestamp': '2018-12-31 18:31:30', 'value': 82},
+        ], aggregation_func=lambda it: sum(d[1] for d in it))
+        out = np.zeros(6)
+        n = t.generate('2018-12-31 18:30:00', '2018-12-31 18:32:00', '1 min',
+                       '30 seconds', out=out)
+        self.assertEqual(n, 4)
+        self.assertEqual(
+            list(out), [89.0 + 82.0, 82.0 + 80.0, 80.0 + 82.0, 82.0, 0, 0]
+        )
+        buf = bytearray(8 * 2)
+        n = t.generate('2018-12-31 18:30:00', '2018-12-31 18:32:00', '1 min',
+                       '30 seconds', out=buf)
+        self.assertEqual(n, 2)
+        self.assertEqual(
+            list(np.frombuffer(buf, dtype=np.float64)),
+            [89.0 + 82.0, 82.0 + 80.0]
+        )
@@ -1,14 +1,147 @@
 # -*- coding: utf-8 -*-
 
 from datetime import datetime, timedelta
+from itertools import islice
+from operator import itemgetter
+import multiprocessing
+import sys
 import time
+from timeit import default_timer
 
+import numpy as np
 from sortedcontainers import SortedList
 from dateutil.parser import parse as dtparse
 from pytimeparse import parse as tparse
 from scipy import interpolate
 
 
+_GENERATE_CHUNKSIZE = 65536
+
+_worker_mktuple = None
+
+
+def _init_worker(mktuple):
+    global _worker_mktuple
+    _worker_mktuple = mktuple
+
+
+def _parse_chunk(chunk):
+    return sorted((_worker_mktuple(d) for d in chunk), key=itemgetter(0))
+
+
+def _chunked(seq, chunksize):
+    it = iter(seq)
+    while True:
+        chunk = list(islice(it, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _concat_chunks(chunks):
+    # keep the chunks in input order and leave the merge of the pre-sorted
+    # runs to the stable sort of the store, so that records sharing a
+    # timestamp keep their input order, as they do with serial parsing.
+    records = []
+    for chunk in chunks:
+        records.extend(chunk)
+    return records
+
+
+def _as_float64_array(out):
+    if isinstance(out, np.ndarray):
+        if out.dtype != np.float64:
+            raise ValueError('out must be of dtype float64')
+        arr = out
+    else:
+        # accept float64 items or raw bytes (``bytearray``, ``mmap``,
+        # shared memory); other item types would be reinterpreted.
+        view = memoryview(out)
+        if view.ndim != 1:
+            raise ValueError('out must be one-dimensional')
+        if not getattr(view, 'c_contiguous', True):
+            raise ValueError('out must be contiguous')
+        if view.format.lstrip('@=') not in ('d', 'B', 'b', 'c'):
+            raise ValueError('out must be a float64 or byte buffer')
+        arr = np.frombuffer(view, dtype=np.float64)
+    if arr.ndim != 1:
+        raise ValueError('out must be one-dimensional')
+    if not arr.flags.writeable:
+        raise ValueError('out must be writable')
+    return arr
+
+
+def _get_pool_context():
+    # worker initializer receives the user-supplied callables, which are
+    # often lambdas, so only ``fork`` works; ``None`` if it is unavailable.
+    try:
+        return multiprocessing.get_context('fork')
+    except AttributeError:
+        # python 2 always forks on posix.
+        return None if sys.platform == 'win32' else multiprocessing
+    except ValueError:
+        return None
+
+
+class Stats(object):
+    """Counters and cumulative timings of the hot paths of a time series.
+
+    Each recorded event is also passed to the registered hooks as
+    ``hook(event, values)``, where ``event`` is one of ``'parse'``,
+    ``'insert'``, ``'rebuild'``, ``'query'`` or ``'window'`` and ``values``
+    is a ``dict`` with ``count`` and ``time`` (and ``samples`` for
+    ``'window'``).
+
+    ``queries`` counts the points evaluated by the interpolator, i.e. one per
+    ``Interpolator.__call__`` and one per value written by
+    ``Interpolator.generate`` with ``out``, which evaluates a whole chunk of
+    points in a single call.
+    """
+    _keys = {
+        'parse': ('records_parsed', 'parse_time'),
+        'insert': ('inserts', 'insert_time'),
+        'rebuild': ('rebuilds', 'rebuild_time'),
+        'query': ('queries', 'query_time'),
+        'window': ('windows', 'window_time'),
+    }
+
+    def __init__(self):
+        self.__hooks = []
+        self.reset()
+
+    def reset(self):
+        self.__data = {
+            'records_parsed': 0, 'parse_time': 0.0, 'inserts': 0,
+            'insert_time': 0.0, 'rebuilds': 0, 'rebuild_time': 0.0,
+            'queries': 0, 'query_time': 0.0, 'windows': 0,
+            'window_time': 0.0, 'samples_scanned': 0,
+            'max_samples_per_window': 0
+        }
+
+    def add_hook(self, hook):
+        self.__hooks.append(hook)
+
+    def remove_hook(self, hook):
+        self.__hooks.remove(hook)
+
+    def record(self, event, count=1, elapsed=0.0, samples=None):
+        count_key, time_key = self._keys[event]
+        self.__data[count_key] += count
+        self.__data[time_key] += elapsed
+        values = {'count': count, 'time': elapsed}
+        if samples is not None:
+            self.__data['samples_scanned'] += samples
+            self.__data['max_samples_per_window'] = max(
+                self.__data['max_samples_per_window'], samples
+            )
+            values['samples'] = samples
+        for hook in self.__hooks:
+            hook(event, values)
+
+    def as_dict(self):
+        return dict(self.__data)
+
+
 class UserSortedList(object):
     def __init__(self, iterable=None, key=None):
         self.data = SortedList(iterable=iterable, key=key)
@@ -160,20 +293,115 @@ class BaseTimeSeries(UserSortedList):
         The attribute name for value. It can be single argument function or
         ``str`` or ``int``. ``str`` or ``int`` is used to extract value from
         an item (say ``x``) via ``x[value_attr]``.
+    processes: None, int
+        The number of worker processes used to parse ``seq``. ``None`` or
+        ``1`` parses serially. Workers are started with ``fork``; where it
+        is unavailable (e.g. on Windows) ``seq`` is parsed serially.
+    chunksize: None, int
+        The number of records handed to a worker at a time. Only used when
+        ``processes`` is greater than ``1``.
+    instrument: bool
+        If ``True``, counters and timings of the hot paths are collected and
+        available via ``stats()``. Disabled by default.
     """
     def __init__(self, seq, ts_format=None, ts_attr=None, value_format=None,
-                 value_attr=None):
+                 value_attr=None, processes=None, chunksize=None,
+                 instrument=False):
+        self._stats = Stats() if instrument else None
         self.ts_format = ts_format
         self.ts_attr = ts_attr
         self.value_format = value_format
         self.value_attr = value_attr
-        super(BaseTimeSeries, self).__init__(
-            (self._mktuple(d) for d in seq), key=lambda d: d[0]
+        begin = default_timer() if self._stats is not None else None
+        if processes is None or processes <= 1:
+            records = (self._mktuple(d) for d in seq)
+        else:
+            records = self._parse_parallel(seq, processes, chunksize)
+        if self._stats is not None:
+            records = list(records)
+            self._stats.record(
+                'parse', len(records), default_timer() - begin
+            )
+        super(BaseTimeSeries, self).__init__(records, key=lambda d: d[0])
+
+    def stats(self):
+        """returns a ``dict`` of the counters and cumulative timings (in
+        seconds) collected so far, or ``None`` if instrumentation is disabled.
+        """
+        if self._stats is None:
+            return None
+        return self._stats.as_dict()
+
+    def reset_stats(self):
+        if self._stats is not None:
+            self._stats.reset()
+
+    def add_hook(self, hook):
+        """registers ``hook`` which is called as ``hook(event, values)`` on
+        every instrumented event. See ``Stats``.
+        """
+        if self._stats is None:
+            raise ValueError('instrumentation is disabled')
+        self._stats.add_hook(hook)
+
+    def remove_hook(self, hook):
+        if self._stats is None:
+            raise ValueError('instrumentation is disabled')
+        self._stats.remove_hook(hook)
+
+    def add(self, value):
+        if self._stats is None:
+            return super(BaseTimeSeries, self).add(value)
+        begin = default_timer()
+        res = super(BaseTimeSeries, self).add(value)
+        self._stats.record('insert', elapsed=default_timer() - begin)
+        return res
+
+    def update(self, iterable):
+        if self._stats is None:
+            return super(BaseTimeSeries, self).update(iterable)
+        iterable = list(iterable)
+        begin = default_timer()
+        res = super(BaseTimeSeries, self).update(iterable)
+        self._stats.record(
+            'insert', len(iterable), default_timer() - begin
         )
+        return res
+
+    def _rebuild(self):
+        if self._stats is None:
+            return self._update()
+        begin = default_timer()
+        self._update()
+        self._stats.record('rebuild', elapsed=default_timer() - begin)
+
+    def _parse_parallel(self, seq, processes, chunksize=None):
+        if chunksize is None:
+            try:
+                chunksize = -(-len(seq) // (processes * 4))
+            except TypeError:
+                chunksize = 10000
+        context = _get_pool_context()
+        if context is None:
+            return [self._mktuple(d) for d in seq]
+        pool = context.Pool(
+            processes, initializer=_init_worker, initargs=(self._mktuple,)
+        )
+        try:
+            chunks = list(pool.imap(
+                _parse_chunk, _chunked(seq, max(chunksize, 1))
+            ))
+        except BaseException:
+            pool.terminate()
+            pool.join()
+            raise
+        pool.close()
+        pool.join()
+        return _concat_chunks(chunks)
 
     def _try_update(self):
         if self.is_changed():
-            self._update()
+            self._rebuild()
             self.mark_as_updated()
 
     @property
@@ -286,15 +514,27 @@ class Interpolator(BaseTimeSeries):
         The attribute name for value. It can be single argument function or
         ``str`` or ``int``. ``str`` or ``int`` is used to extract value from
         an item (say ``x``) via ``x[value_attr]``.
+    processes: None, int
+        The number of worker processes used to parse ``seq``. ``None`` or
+        ``1`` parses serially. Workers are started with ``fork``; where it
+        is unavailable (e.g. on Windows) ``seq`` is parsed serially.
+    chunksize: None, int
+        The number of records handed to a worker at a time. Only used when
+        ``processes`` is greater than ``1``.
+    instrument: bool
+        If ``True``, counters and timings of the hot paths are collected and
+        available via ``stats()``. Disabled by default.
     """
     def __init__(self, seq, ts_format=None, ts_attr=None, value_format=None,
-                 value_attr=None, kind=None):
+                 value_attr=None, kind=None, processes=None, chunksize=None,
+                 instrument=False):
         super(Interpolator, self).__init__(
             seq=seq, ts_format=ts_format, ts_attr=ts_attr,
-            value_format=value_format, value_attr=value_attr
+            value_format=value_format, value_attr=value_attr,
+            processes=processes, chunksize=chunksize, instrument=instrument
         )
         self.__kind = 'linear' if kind is None else kind
-        self._update()
+        self._rebuild()
 
     @property
     def kind(self):
@@ -315,7 +555,12 @@ class Interpolator(BaseTimeSeries):
         return self.__ip
 
     def __call__(self, ts, ts_format=None):
-        return self.ip(self._tidy_ts_value(ts, ts_format))
+        if self._stats is None:
+            return self.ip(self._tidy_ts_value(ts, ts_format))
+        begin = default_timer()
+        res = self.ip(self._tidy_ts_value(ts, ts_format))
+        self._stats.record('query', elapsed=default_timer() - begin)
+        return res
 
     def _update(self):
         if len(self.data) > 0:
@@ -327,19 +572,55 @@ class Interpolator(BaseTimeSeries):
             self.__ip = lambda x: 0.0
 
     def generate(self, start, end, step, ts_format=None, step_format=None,
-                 value_only=False):
+                 value_only=False, out=None):
         """returns a generator of the sequence from ``start`` to ``end`` with
-        interval ``step``.
+        interval ``step``, or writes the values into ``out`` and returns the
+        number of values written if ``out`` is given. The arguments are
+        converted when ``generate`` is called, so invalid ones raise
+        immediately rather than on the first iteration.
 
         Parameters
         ----------
         start: datetime, int, float, str
             The start of the sequence. ``int`` or ``float`` value is treated
             as UNIX timestamp. Other values are converted by ``ts_format``
+        out: None, numpy.ndarray, writable buffer
+            If given, the values are written into ``out`` in chunks instead
+            of being yielded, and the number of values written is returned.
+            Arrays and buffers must be one-dimensional and contiguous, with
+            ``float64`` or byte items; bytes are viewed as ``float64``. At
+            most ``len(out)`` values are written.
         """
         s = self._tidy_ts_value(start, ts_format=ts_format)
         e = self._tidy_ts_value(end, ts_format=ts_format)
         diff = self._tidy_step(step, step_format=step_format)
+        if out is not None:
+            return self._generate_into(s, e, diff, _as_float64_array(out))
+        return self._generate(s, e, diff, value_only)
+
+    def _generate_into(self, s, e, diff, out):
+        n = 0
+        i = s
+        while n < len(out) and i < e:
+            k = min(_GENERATE_CHUNKSIZE, len(out) - n)
+            # accumulate sequentially so that timestamps match ``_generate``.
+            ts = np.full(k, diff, dtype=np.float64)
+            ts[0] = i
+            ts = np.cumsum(ts)
+            m = k if ts[-1] < e else int(np.argmax(ts >= e))
+            if self._stats is None:
+                out[n:n + m] = self.ip(ts[:m])
+            else:
+                begin = default_timer()
+                out[n:n + m] = self.ip(ts[:m])
+                self._stats.record('query', m, default_timer() - begin)
+            n += m
+            if m < k:
+                break
+            i = ts[-1] + diff
+        return n
+
+    def _generate(self, s, e, diff, value_only):
         i = s
         if not value_only:
             while i < e:
@@ -375,41 +656,88 @@ class Aggregator(BaseTimeSeries):
         The attribute name for value. It can be single argument function or
         ``str`` or ``int``. ``str`` or ``int`` is used to extract value from
         an item (say ``x``) via ``x[value_attr]``.
+    processes: None, int
+        The number of worker processes used to parse ``seq``. ``None`` or
+        ``1`` parses serially. Workers are started with ``fork``; where it
+        is unavailable (e.g. on Windows) ``seq`` is parsed serially.
+    chunksize: None, int
+        The number of records handed to a worker at a time. Only used when
+        ``processes`` is greater than ``1``.
+    instrument: bool
+        If ``True``, counters and timings of the hot paths are collected and
+        available via ``stats()``. Disabled by default.
     """
     def __init__(self, seq, ts_format=None, ts_attr=None, value_format=None,
-                 value_attr=None, aggregation_func=None):
+                 value_attr=None, aggregation_func=None, processes=None,
+                 chunksize=None, instrument=False):
         super(Aggregator, self).__init__(
             seq=seq, ts_format=ts_format, ts_attr=ts_attr,
-            value_format=value_format, value_attr=value_attr
+            value_format=value_format, value_attr=value_attr,
+            processes=processes, chunksize=chunksize, instrument=instrument
         )
         self.aggregation_func = aggregation_func
-        self._update()
+        self._rebuild()
 
     def __call__(self, start, stop, ts_format=None):
         start = self._tidy_ts_value(start, ts_format)
         stop = self._tidy_ts_value(stop, ts_format)
-        return self.aggregation_func(
-            self.irange((start, None), (stop, None), inclusive=(True, False))
+        if self._stats is None:
+            return self.aggregation_func(self.irange(
+                (start, None), (stop, None), inclusive=(True, False)
+            ))
+        begin = default_timer()
+        window = list(self.irange(
+            (start, None), (stop, None), inclusive=(True, False)
+        ))
+        res = self.aggregation_func(iter(window))
+        self._stats.record(
+            'window', elapsed=default_timer() - begin, samples=len(window)
         )
+        return res
 
     def _update(self):
         pass
 
     def generate(self, start, end, duration, step, ts_format=None,
-                 step_format=None, value_only=False):
+                 step_format=None, value_only=False, out=None):
         """returns a generator of the sequence from ``start`` to ``end`` with
-        interval ``step``.
+        interval ``step``, or writes the values into ``out`` and returns the
+        number of values written if ``out`` is given. The arguments are
+        converted when ``generate`` is called, so invalid ones raise
+        immediately rather than on the first iteration.
 
         Parameters
         ----------
         start: datetime, int, float, str
             The start of the sequence. ``int`` or ``float`` value is treated
             as UNIX timestamp. Other values are converted by ``ts_format``
+        out: None, numpy.ndarray, writable buffer
+            If given, the values are written into ``out`` instead of being
+            yielded, and the number of values written is returned. Arrays
+            and buffers must be one-dimensional and contiguous, with
+            ``float64`` or byte items; bytes are viewed as ``float64``. At
+            most ``len(out)`` values are written.
         """
         s = self._tidy_ts_value(start, ts_format=ts_format)
         e = self._tidy_ts_value(end, ts_format=ts_format)
         diff = self._tidy_step(step, step_format=step_format)
         dur = self._tidy_step(duration, step_format=step_format)
+        if out is not None:
+            return self._generate_into(
+                s, e, dur, diff, _as_float64_array(out)
+            )
+        return self._generate(s, e, dur, diff, value_only)
+
+    def _generate_into(self, s, e, dur, diff, out):
+        n = 0
+        i = s
+        while n < len(out) and i < e:
+            out[n] = self(i, i+dur)
+            n += 1
+            i += diff
+        return n
+
+    def _generate(self, s, e, dur, diff, value_only):
         i = s
         if not value_only:
             while i < e: